@@ -15,21 +15,27 @@ Email: bruce.yichai20250505@gmail.com
 版本: 1.0 (2025-11-14)
 """
 
+import os
+import re
 import sys
+import mmap
 import logging
+import logging.handlers
 from pathlib import Path
-from io import BytesIO
 from datetime import datetime
-from reportlab.pdfgen import canvas
-from pypdf import PdfReader, PdfWriter
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import freeze_support
+import pymupdf  # PyMuPDF：MuPDF C 引擎的 Python 綁定
 
 
 # -------------------------------------------------------------
 # 自我定位：獲取程式所在目錄（不依賴當前工作目錄）
 # -------------------------------------------------------------
+@lru_cache(maxsize=1)
 def get_script_dir():
     """
-    獲取程式所在目錄的絕對路徑
+    獲取程式所在目錄的絕對路徑（結果快取，resolve 只做一次）
     支援：
     - 直接執行 Python 腳本
     - 打包成 EXE（PyInstaller）
@@ -55,20 +61,65 @@ SCRIPT_DIR = get_script_dir()
 LOG_FILE = SCRIPT_DIR / "numbering_tool.txt"
 
 
+class _DeferredFlushMemoryHandler(logging.handlers.MemoryHandler):
+    """進入處理階段前把 flush 擋下的 MemoryHandler
+
+    logging.shutdown() 結束前會無條件 flush 所有 handler，連同延遲開檔
+    的 FileHandler 一起把緩衝中的 banner 寫進檔案、截斷上一次的 log。
+    因此在 arm() 之前把 flush 視為 no-op：使用者在互動提示就取消執行
+    的話，緩衝直接丟棄、舊 log 原封不動。容量滿或遇到 ERROR（值得落盤
+    的情況）會自動解鎖，main 進入處理階段時也會呼叫 arm()。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._armed = False
+
+    def arm(self):
+        self._armed = True
+
+    def shouldFlush(self, record):
+        should = super().shouldFlush(record)
+        if should:
+            self._armed = True
+        return should
+
+    def flush(self):
+        if self._armed:
+            super().flush()
+
+
 def setup_logging():
     """設定 logging，輸出到固定檔名並覆蓋舊檔案"""
     # 設定 logging 格式
     log_format = "%(asctime)s - %(levelname)s - %(message)s"
     date_format = "%Y-%m-%d %H:%M:%S"
-    
+
     # 設定 logging，使用 'w' 模式覆蓋舊檔案
+    # delay=True：第一次真正 flush 到檔案時才開檔截斷，搭配上面的
+    # 延遲 flush，提早離開就不會動到上一次的 log
+    # 檔案 handler 外再包一層 MemoryHandler：記錄先在記憶體累積、
+    # 滿了或遇到 ERROR 才批次寫檔，逐頁記錄不再每筆都 flush 一次
+    file_handler = logging.FileHandler(str(LOG_FILE), mode='w', encoding='utf-8', delay=True)  # 覆蓋模式
+    # basicConfig 只會把格式設到它拿到的 handler（MemoryHandler）上，
+    # 被包住的 FileHandler 要自己設定，否則寫檔時會退回預設格式
+    file_handler.setFormatter(logging.Formatter(log_format, date_format))
+    buffered_handler = _DeferredFlushMemoryHandler(
+        capacity=1024, flushLevel=logging.ERROR, target=file_handler
+    )
+
+    # 控制台只顯示 WARNING 以上：使用者看進度靠 print()，
+    # 逐頁的 INFO 記錄不必再往 stdout 重複輸出一次
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setLevel(logging.WARNING)
+
     logging.basicConfig(
         level=logging.INFO,
         format=log_format,
         datefmt=date_format,
         handlers=[
-            logging.FileHandler(str(LOG_FILE), mode='w', encoding='utf-8'),  # 覆蓋模式
-            logging.StreamHandler(sys.stdout)  # 同時輸出到控制台
+            buffered_handler,
+            stream_handler
         ]
     )
     
@@ -77,13 +128,61 @@ def setup_logging():
     logger.info("PDF Numbering Tool 開始執行")
     logger.info(f"執行時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info("=" * 60)
-    
+
     return logger
 
 
+def arm_log_flush():
+    """進入處理階段後解鎖 log 緩衝（此後離開程式都會把緩衝寫進檔案）"""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, _DeferredFlushMemoryHandler):
+            handler.arm()
+
+
+def flush_log_buffer():
+    """把緩衝中的 log 記錄立即寫入檔案（main 正常結束時呼叫）"""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+
 # -------------------------------------------------------------
 # 讀取設定檔 coords.env
 # -------------------------------------------------------------
+# coords.env 的「KEY=VALUE」行（註解與空白行不會被比對到）
+_CONFIG_LINE = re.compile(rb"(?m)^\s*([A-Z_]\w*)\s*=\s*([^\s#]+)")
+
+_INT_KEYS = ("X1", "Y1", "X2", "Y2", "DIGITS", "PAD")
+_BOOL_KEYS = ("DRAW_BOX", "DRAW_CIRCLE")
+
+
+@lru_cache(maxsize=4)
+def _parse_config_file(config_path, mtime_ns):
+    """解析 coords.env，以 (路徑, mtime) 為快取鍵
+
+    當本模組被當作函式庫重複呼叫時，檔案沒變就不必重讀重解析
+    """
+    # mmap 後直接在檔案緩衝上做一次 regex 掃描，
+    # 不經過 read() 的位元組複製，也省掉文字模式的解碼
+    raw = {}
+    with open(str(config_path), "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                raw = {m.group(1).decode(): m.group(2).decode()
+                       for m in _CONFIG_LINE.finditer(mm)}
+
+    config = {}
+    for key in _INT_KEYS:
+        try:
+            config[key] = int(raw.get(key, 0))
+        except ValueError:
+            config[key] = 0
+    for key in _BOOL_KEYS:
+        config[key] = 1 if raw.get(key) == "1" else 0
+
+    return config
+
+
 def load_config(config_path=None, logger=None):
     """讀取設定檔 coords.env"""
     if config_path is None:
@@ -93,8 +192,6 @@ def load_config(config_path=None, logger=None):
         # 如果是相對路徑，轉換為基於程式目錄的絕對路徑
         config_path = SCRIPT_DIR / config_path
     
-    config = {}
-
     if not config_path.exists():
         error_msg = f"錯誤：找不到設定檔 {config_path}"
         if logger:
@@ -105,30 +202,8 @@ def load_config(config_path=None, logger=None):
     if logger:
         logger.info(f"讀取設定檔：{config_path}")
 
-    with open(str(config_path), "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-
-            if not line or line.startswith("#"):
-                continue
-
-            if "=" in line:
-                key, value = line.split("=", 1)
-                key, value = key.strip(), value.strip()
-
-                if key in ["X1", "Y1", "X2", "Y2", "DIGITS", "PAD"]:
-                    try:
-                        config[key] = int(value)
-                    except:
-                        config[key] = 0
-
-                elif key in ["DRAW_BOX", "DRAW_CIRCLE"]:
-                    config[key] = 1 if value == "1" else 0
-
-    required = ["X1", "Y1", "X2", "Y2", "DIGITS", "PAD", "DRAW_BOX", "DRAW_CIRCLE"]
-    for key in required:
-        if key not in config:
-            config[key] = 0
+    # 回傳複本，呼叫端改動 config 不會汙染快取
+    config = dict(_parse_config_file(config_path, config_path.stat().st_mtime_ns))
 
     if logger:
         logger.info(f"設定載入完成：編號位數={config['DIGITS']}, 位置1=({config['X1']}, {config['Y1']}), "
@@ -141,10 +216,13 @@ def load_config(config_path=None, logger=None):
 # 檔名排序
 # -------------------------------------------------------------
 def extract_prefix_sort_key(filename):
-    """提取檔名前綴作為排序鍵，優先順序：純數字 > 字母開頭 > 其他"""
-    name = filename.stem
-    # 提取第一個前綴（以 _ 或 - 分隔）
-    prefix = name.split("_")[0].split("-")[0]
+    """提取檔名前綴作為排序鍵，優先順序：純數字 > 字母開頭 > 其他
+
+    參數為檔名字串（不含路徑），避免在排序熱路徑上建立 Path 物件
+    """
+    name = filename.rsplit(".", 1)[0]
+    # 提取第一個前綴（以 _ 或 - 分隔；maxsplit=1 只切到第一個分隔符為止）
+    prefix = name.split("_", 1)[0].split("-", 1)[0]
 
     # 純數字（如日期 20251031）
     if prefix.isdigit():
@@ -172,16 +250,21 @@ def find_all_pdfs_with_selection(input_dir=None, logger=None):
         print(error_msg)
         sys.exit(1)
 
-    pdf_files = list(input_path.glob("*.pdf"))
-    if not pdf_files:
+    # 使用 os.scandir 列舉（DirEntry 會快取 stat 結果，比 glob 少一次 syscall）
+    with os.scandir(input_path) as it:
+        pdf_names = [e.name for e in it
+                     if e.is_file() and e.name.lower().endswith(".pdf")]
+
+    if not pdf_names:
         error_msg = "錯誤：資料夾內沒有 PDF"
         if logger:
             logger.error(error_msg)
         print(error_msg)
         sys.exit(1)
 
-    # 按檔名前綴排序
-    pdf_files = sorted(pdf_files, key=extract_prefix_sort_key)
+    # 按檔名前綴排序（先以字串排序，最後才包成 Path）
+    pdf_names.sort(key=extract_prefix_sort_key)
+    pdf_files = [input_path / name for name in pdf_names]
 
     if logger:
         logger.info(f"在 {input_path} 資料夾中找到 {len(pdf_files)} 個 PDF 檔案")
@@ -193,44 +276,47 @@ def find_all_pdfs_with_selection(input_dir=None, logger=None):
             logger.info(f"僅找到一個檔案，自動選擇：{pdf_files[0].name}")
         return pdf_files
 
-    # 多個檔案時才需要選擇
-    print(f"\n找到 {len(pdf_files)} 個 PDF：")
-    for idx, pdf in enumerate(pdf_files, 1):
-        print(f"  {idx:>2}) {pdf.name}")
-        if logger:
-            logger.info(f"  {idx:>2}) {pdf.name}")
+    # 多個檔案時才需要選擇；清單太長只列頭尾，省下 O(N) 的輸出與 log，
+    # 實際處理到的檔案之後都會有自己的 log 紀錄
+    total = len(pdf_files)
+    print(f"\n找到 {total} 個 PDF：")
+    if total > 50:
+        for idx in range(1, 11):
+            print(f"  {idx:>2}) {pdf_files[idx - 1].name}")
+        print(f"  ...（{total - 15} 個未列出）...")
+        for idx in range(total - 4, total + 1):
+            print(f"  {idx:>2}) {pdf_files[idx - 1].name}")
+    else:
+        for idx, pdf in enumerate(pdf_files, 1):
+            print(f"  {idx:>2}) {pdf.name}")
+            if logger:
+                logger.info(f"  {idx:>2}) {pdf.name}")
 
     print()
     try:
-        choice = input("請輸入要處理的序號（或 ALL 全部）：").strip().upper()
+        choice = input("請輸入要處理的序號（或 ALL 全部）：").strip()
     except KeyboardInterrupt:
         if logger:
             logger.warning("使用者中斷程式")
         print("\n\n程式已取消")
         sys.exit(0)
 
-    selected_files = []
-    if choice == "ALL" or choice == "":
+    # 以 isdecimal 判斷取代 try/except int：不合法輸入不再走例外機制
+    # （isdecimal 為真保證 int() 一定成功；isdigit 會放行 ⑤、² 這類字元）
+    if not choice or choice.upper() == "ALL":
         selected_files = pdf_files
         if logger:
             logger.info("使用者選擇處理全部檔案")
+    elif choice.isdecimal() and 1 <= int(choice) <= len(pdf_files):
+        num = int(choice)
+        selected_files = [pdf_files[num - 1]]
+        if logger:
+            logger.info(f"使用者選擇處理第 {num} 個檔案：{pdf_files[num - 1].name}")
     else:
-        try:
-            num = int(choice)
-            if 1 <= num <= len(pdf_files):
-                selected_files = [pdf_files[num - 1]]
-                if logger:
-                    logger.info(f"使用者選擇處理第 {num} 個檔案：{pdf_files[num - 1].name}")
-            else:
-                if logger:
-                    logger.warning(f"輸入無效：{choice}，將處理全部檔案")
-                print("錯誤：輸入無效，將處理全部檔案")
-                selected_files = pdf_files
-        except ValueError:
-            if logger:
-                logger.warning(f"輸入無效：{choice}，將處理全部檔案")
-            print("錯誤：輸入無效，將處理全部檔案")
-            selected_files = pdf_files
+        if logger:
+            logger.warning(f"輸入無效：{choice}，將處理全部檔案")
+        print("錯誤：輸入無效，將處理全部檔案")
+        selected_files = pdf_files
 
     return selected_files
 
@@ -238,111 +324,170 @@ def find_all_pdfs_with_selection(input_dir=None, logger=None):
 # -------------------------------------------------------------
 # 編號
 # -------------------------------------------------------------
-def format_number(number, digits):
-    return str(number).zfill(digits)
+def make_number_formatter(digits):
+    """回傳把整數格式化成固定位數字串的函式
 
+    綁定一次 str.format，熱迴圈裡每個編號就省掉一次函式呼叫與
+    zfill 的屬性查找（每頁要格式化兩個編號）
+    """
+    return f"{{:0{digits}d}}".format
 
-def create_number_overlay(number1, number2, config, page_width, page_height):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=(page_width, page_height))
 
-    font_size = 12
-    c.setFont("Helvetica-Bold", font_size)
+# 編號一律用同一種字型與字級（"hebo" 是 MuPDF 內建的 Helvetica-Bold）
+FONT_NAME = "hebo"
+FONT_SIZE = 12
 
-    h = font_size
 
-    # --- 第一個編號 ---
-    x1, y1 = config["X1"], config["Y1"]
-    t1 = format_number(number1, config["DIGITS"])
-    w1 = c.stringWidth(t1, "Helvetica-Bold", font_size)
+@lru_cache(maxsize=None)
+def _number_width(text):
+    """快取編號字串的字寬：DIGITS 固定時字串種類有限（至多 10^DIGITS 種），
+    大批次處理時可省掉每頁重複的字型度量查詢"""
+    return pymupdf.get_text_length(text, fontname=FONT_NAME, fontsize=FONT_SIZE)
 
-    if config["DRAW_BOX"]:
-        c.rect(x1 - config["PAD"], y1 - config["PAD"], w1 + config["PAD"] * 2, h + config["PAD"] * 2)
-    elif config["DRAW_CIRCLE"]:
-        radius = max(w1, h) / 2 + config["PAD"]
-        c.circle(x1 + w1 / 2, y1 + h / 2, radius)
 
-    c.drawString(x1, y1, t1)
+def make_page_annotator(config):
+    """依設定預先挑好繪製路徑，回傳 draw(page, t1, t2) 閉包
 
-    # --- 第二個編號 ---
+    DRAW_BOX / DRAW_CIRCLE 與座標在整次執行中固定，不必每頁每個編號都
+    重新分支與查 dict；閉包直接以區域變數捕捉座標與間距。繪製交給
+    MuPDF 的 C 層（insert_text / draw_rect / draw_circle），Python 只做
+    座標換算。注意 MuPDF 以左上角為原點、y 軸向下，設定檔沿用 PDF 習慣
+    （左下原點），因此以頁高翻轉 y。
+    """
+    x1, y1 = config["X1"], config["Y1"]
     x2, y2 = config["X2"], config["Y2"]
-    t2 = format_number(number2, config["DIGITS"])
-    w2 = c.stringWidth(t2, "Helvetica-Bold", font_size)
+    pad = config["PAD"]
+    digits = config["DIGITS"]
+
+    # Helvetica-Bold 的十個數字字寬相同，DIGITS 沒溢位時外框幾何完全一樣
+    template_width = _number_width("0" * digits)
 
+    # 外框樣式只挑一次
     if config["DRAW_BOX"]:
-        c.rect(x2 - config["PAD"], y2 - config["PAD"], w2 + config["PAD"] * 2, h + config["PAD"] * 2)
+        def draw_shape(page, x, y, w, page_height):
+            rect = pymupdf.Rect(x - pad, page_height - (y + FONT_SIZE + pad),
+                                x + w + pad, page_height - (y - pad))
+            page.draw_rect(rect)
     elif config["DRAW_CIRCLE"]:
-        radius = max(w2, h) / 2 + config["PAD"]
-        c.circle(x2 + w2 / 2, y2 + h / 2, radius)
+        def draw_shape(page, x, y, w, page_height):
+            radius = max(w, FONT_SIZE) / 2 + pad
+            center = pymupdf.Point(x + w / 2, page_height - (y + FONT_SIZE / 2))
+            page.draw_circle(center, radius)
+    else:
+        draw_shape = None
 
-    c.drawString(x2, y2, t2)
+    def draw(page, t1, t2):
+        page_height = page.rect.height
+        for x, y, text in ((x1, y1, t1), (x2, y2, t2)):
+            if draw_shape is not None:
+                w = template_width if len(text) == digits else _number_width(text)
+                draw_shape(page, x, y, w, page_height)
+            page.insert_text(pymupdf.Point(x, page_height - y), text,
+                             fontname=FONT_NAME, fontsize=FONT_SIZE)
 
-    c.save()
-    buffer.seek(0)
-    return buffer
+    return draw
 
 
 # -------------------------------------------------------------
 # 處理 PDF
 # -------------------------------------------------------------
-def process_pdf(input_pdf_path, output_pdf_path, start_number, config, logger=None):
-    """處理 PDF，在每頁加入編號"""
+def process_pdf(input_pdf_path, output_pdf_path, start_number, config, logger=None, verbose=True):
+    """處理 PDF，在每頁加入編號
+
+    verbose=False 時不輸出逐頁訊息（多行程平行處理時避免輸出交錯）
+    """
     if logger:
         logger.info(f"開始處理：{input_pdf_path.name} -> {output_pdf_path.name}")
         logger.info(f"起始編號：{start_number}")
 
-    reader = PdfReader(input_pdf_path)
-    writer = PdfWriter()
+    # 先確保輸出目錄存在，權限或路徑問題在逐頁處理前就會發現
+    output_dir = Path(output_pdf_path).parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    doc = pymupdf.open(str(input_pdf_path))
 
     current_number = start_number
-    total_pages = len(reader.pages)
+    total_pages = doc.page_count
+    fmt = make_number_formatter(config["DIGITS"])  # 迴圈外綁定一次
+    draw_numbers = make_page_annotator(config)  # 繪製路徑也只挑一次
 
     if logger:
         logger.info(f"PDF 總頁數：{total_pages}")
 
-    print(f"  共 {total_pages} 頁")
+    if verbose:
+        print(f"  共 {total_pages} 頁")
 
-    for page_index, page in enumerate(reader.pages, 1):
-        page_width = float(page.mediabox.width)
-        page_height = float(page.mediabox.height)
+    # 逐頁輸出改成同一行的進度列，大檔最多更新約 100 次，減少 stdout flush
+    progress_step = max(1, total_pages // 100)
 
+    # 不畫框且兩個座標都沒設定（留在原點）時，疊加層等於空白，
+    # 直接沿用原頁即可，連繪製都不必做
+    overlay_is_noop = (
+        not config["DRAW_BOX"] and not config["DRAW_CIRCLE"]
+        and (config["X1"], config["Y1"]) == (0, 0)
+        and (config["X2"], config["Y2"]) == (0, 0)
+    )
+
+    for page_index in range(1, total_pages + 1):
         num1 = current_number
         num2 = current_number + 1
         current_number += 2
 
-        num1_str = format_number(num1, config['DIGITS'])
-        num2_str = format_number(num2, config['DIGITS'])
-        
-        print(f"    → 第 {page_index} 頁：{num1_str} / {num2_str}")
-        
+        num1_str = fmt(num1)
+        num2_str = fmt(num2)
+
+        if verbose and (page_index % progress_step == 0 or page_index == total_pages):
+            sys.stdout.write(f"\r    → 第 {page_index}/{total_pages} 頁：{num1_str} / {num2_str}")
+            sys.stdout.flush()
+
         if logger:
             logger.info(f"  第 {page_index}/{total_pages} 頁：編號 {num1_str} / {num2_str}")
 
-        try:
-            overlay_buf = create_number_overlay(num1, num2, config, page_width, page_height)
-            overlay_reader = PdfReader(overlay_buf)
-            overlay_page = overlay_reader.pages[0]
+        if overlay_is_noop:
+            continue
 
-            page.merge_page(overlay_page)
-            writer.add_page(page)
+        try:
+            draw_numbers(doc[page_index - 1], num1_str, num2_str)
         except Exception as e:
+            doc.close()
             error_msg = f"處理第 {page_index} 頁時發生錯誤：{str(e)}"
             if logger:
                 logger.error(error_msg)
             raise Exception(error_msg)
 
-    # 確保輸出目錄存在（基於程式目錄）
-    output_dir = Path(output_pdf_path).parent
-    output_dir.mkdir(parents=True, exist_ok=True)
-    with open(str(output_pdf_path), "wb") as f:
-        writer.write(f)
+    if verbose:
+        print()  # 結束進度列
+
+    try:
+        doc.save(str(output_pdf_path), deflate=True, garbage=3)
+    except Exception:
+        # 儲存失敗時不留下半成品輸出檔
+        Path(output_pdf_path).unlink(missing_ok=True)
+        raise
+    finally:
+        doc.close()
 
     if logger:
-        logger.info(f"完成處理：{output_pdf_path.name}，編號範圍 {format_number(start_number, config['DIGITS'])} ~ {format_number(current_number - 1, config['DIGITS'])}")
+        logger.info(f"完成處理：{output_pdf_path.name}，編號範圍 {fmt(start_number)} ~ {fmt(current_number - 1)}")
 
     return current_number  # 回傳下一份 PDF 的起始值
 
 
+def _process_pdf_worker(args):
+    """多行程工作函式：在子行程中處理單一 PDF
+
+    回傳 (檔名, 是否成功, 錯誤訊息, 下一個編號)。子行程裡沒有 logger，
+    每檔的頁數與編號範圍由父行程依回傳值補記到 log
+    """
+    input_pdf_path, output_pdf_path, start_number, config = args
+    try:
+        next_number = process_pdf(input_pdf_path, output_pdf_path, start_number, config,
+                                  logger=None, verbose=False)
+        return (input_pdf_path.name, True, "", next_number)
+    except Exception as e:
+        return (input_pdf_path.name, False, str(e), start_number)
+
+
 # -------------------------------------------------------------
 # 主程式
 # -------------------------------------------------------------
@@ -389,43 +534,46 @@ def main():
     while True:
         try:
             start_input = input("請輸入起始編號（預設 1）：").strip()
-            base_start = int(start_input) if start_input else 1
-            if base_start < 1:
-                print("起始編號必須大於 0")
-                continue
-            break
-        except ValueError:
-            print("請輸入有效整數")
         except KeyboardInterrupt:
             logger.warning("使用者中斷程式")
             print("\n\n程式已取消")
             sys.exit(0)
 
+        if not start_input:
+            base_start = 1
+            break
+        if start_input.isdecimal():
+            base_start = int(start_input)
+            if base_start < 1:
+                print("起始編號必須大於 0")
+                continue
+            break
+        print("請輸入有效整數")
+
     logger.info(f"起始編號：{base_start}")
     print()
 
     # --- 執行處理 ---
-    next_number = base_start
     total_files = len(pdf_list)
-    
+
+    # 真的要動手處理了，解鎖 log 緩衝：之前在提示階段取消執行
+    # 會直接丟棄緩衝、保留上一次的 log
+    arm_log_flush()
     logger.info(f"開始處理 {total_files} 個 PDF 檔案")
 
     success_count = 0
     fail_count = 0
 
-    for idx, pdf_path in enumerate(pdf_list, 1):
-        print(f"\n[{idx}/{total_files}] 處理：{pdf_path.name}")
-
-        if mode == "1":
-            start_number = base_start
-        else:
-            start_number = next_number
+    if total_files == 1:
+        # 單一檔案直接在主行程處理，保留逐頁輸出
+        pdf_path = pdf_list[0]
+        print(f"\n[1/1] 處理：{pdf_path.name}")
 
         # 生成輸出檔名（避免覆蓋，使用程式目錄下的 output 資料夾）
         output_pdf_path = SCRIPT_DIR / "output" / f"{pdf_path.stem}_numbered.pdf"
-        
+
         try:
-            next_number = process_pdf(pdf_path, output_pdf_path, start_number, config, logger)
+            process_pdf(pdf_path, output_pdf_path, base_start, config, logger)
             print(f"  ✓ 完成：{output_pdf_path.name}")
             success_count += 1
         except Exception as e:
@@ -433,7 +581,57 @@ def main():
             print(f"  ✗ 錯誤：{error_msg}")
             logger.error(error_msg, exc_info=True)
             fail_count += 1
-            continue
+    else:
+        # 多檔案以多行程平行處理（每個檔案獨立，互不相依）：
+        # 模式 1 每檔起始編號相同；模式 2 先便宜地掃一遍各檔頁數
+        # （每頁佔兩個編號），即可預先算出每檔的起始編號。
+        # 預掃時開不了的壞檔直接記一筆失敗並剔除，不讓單一壞檔中斷整批
+        jobs = []
+        if mode == "2":
+            next_number = base_start
+            for pdf_path in pdf_list:
+                try:
+                    with pymupdf.open(str(pdf_path)) as doc:
+                        page_count = doc.page_count
+                except Exception as e:
+                    error_msg = f"處理 {pdf_path.name} 時發生問題：{str(e)}"
+                    print(f"  ✗ 錯誤：{error_msg}")
+                    logger.error(error_msg)
+                    fail_count += 1
+                    continue
+                jobs.append((pdf_path, SCRIPT_DIR / "output" / f"{pdf_path.stem}_numbered.pdf",
+                             next_number, config))
+                next_number += 2 * page_count
+        else:
+            jobs = [
+                (pdf_path, SCRIPT_DIR / "output" / f"{pdf_path.stem}_numbered.pdf", base_start, config)
+                for pdf_path in pdf_list
+            ]
+
+        total_jobs = len(jobs)
+        if total_jobs:
+            workers = min(os.cpu_count() or 1, total_jobs)
+            logger.info(f"使用 {workers} 個行程平行處理")
+            print()
+
+            fmt = make_number_formatter(config["DIGITS"])
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(_process_pdf_worker, jobs)
+                for idx, (job, result) in enumerate(zip(jobs, results), 1):
+                    start_number = job[2]
+                    name, ok, err, end_number = result
+                    if ok:
+                        # 子行程沒有 logger，每檔的頁數與編號範圍在這裡補記
+                        pages = (end_number - start_number) // 2
+                        print(f"[{idx}/{total_jobs}] ✓ 完成：{name}")
+                        logger.info(f"完成：{name}，共 {pages} 頁，"
+                                    f"編號範圍 {fmt(start_number)} ~ {fmt(end_number - 1)}")
+                        success_count += 1
+                    else:
+                        error_msg = f"處理 {name} 時發生問題：{err}"
+                        print(f"[{idx}/{total_jobs}] ✗ 錯誤：{error_msg}")
+                        logger.error(error_msg)
+                        fail_count += 1
 
     # 總結
     summary = f"\n處理完成：成功 {success_count} 個，失敗 {fail_count} 個"
@@ -442,6 +640,7 @@ def main():
     logger.info(f"Log 檔案已儲存至：{LOG_FILE}")
     logger.info(f"程式所在目錄：{SCRIPT_DIR}")
     logger.info("=" * 60)
+    flush_log_buffer()
 
     print("\n" + "=" * 50)
     print("全部完成！結果已輸出到 output 資料夾。")
@@ -450,4 +649,5 @@ def main():
 
 
 if __name__ == "__main__":
+    freeze_support()  # 打包成 EXE（PyInstaller）時 multiprocessing 需要
     main()